@@ -1,20 +1,20 @@
-import os
-from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
+from pathlib import Path
 
-load_dotenv()
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    DB_URL: str = os.environ.get("DB_URL")
-    API_URL: str = os.environ.get("API_URL")
-    BOT_TOKEN: str = os.environ.get("BOT_TOKEN")
+    DB_URL: str | None = None
+    API_URL: str | None = None
+    BOT_TOKEN: str | None = None
+    # Fixed USD rate instead of querying PrivatBank (load tests, offline runs).
+    USD_RATE_OVERRIDE: float | None = None
 
     class Config:
-        env_file = ".env"
+        env_file = Path(__file__).resolve().parent.parent / ".env"
         extra = "allow"
         env_file_encoding = "utf-8"
 
 
 # Initialize the settings
-config = Settings()
\ No newline at end of file
+config = Settings()
@@ -1,18 +1,39 @@
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
 import requests
-from bs4 import BeautifulSoup
+
+from FastAPI.config import config
+
+RATE_TTL_SECONDS = 600
+
+_cached_rate: float = 0.0
+_cached_at: float = 0.0
+
+
+def convert_to_usd(amount_uah, usd_rate: float) -> Decimal:
+    return (Decimal(amount_uah) / Decimal(str(usd_rate))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
 def get_usd_exchange_rate() -> float:
+    global _cached_rate, _cached_at
+    if config.USD_RATE_OVERRIDE:
+        return config.USD_RATE_OVERRIDE
+    if _cached_rate and time.monotonic() - _cached_at < RATE_TTL_SECONDS:
+        return _cached_rate
+
     url = "https://api.privatbank.ua/p24api/pubinfo?json&exchange&coursid=5"
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
 
         for currency in data:
             if currency['ccy'] == 'USD':
                 buy_rate = currency['buy']
-                return float(buy_rate.replace(",", "."))
+                _cached_rate = float(buy_rate.replace(",", "."))
+                _cached_at = time.monotonic()
+                return _cached_rate
         raise ValueError("Курс USD не найден в ответе API")
 
     except Exception as e:
@@ -1,4 +1,5 @@
 import contextlib
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
@@ -8,12 +9,32 @@ Base = declarative_base()
 
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
-        self._session_maker = sessionmaker(bind=self._engine, expire_on_commit=False, class_=AsyncSession)
+    def __init__(self, url: str | None):
+        self._url = url
+        self._engine: AsyncEngine | None = None
+        self._session_maker = None
+
+    def init(self):
+        if self._engine is None:
+            if not self._url:
+                raise Exception("DB_URL is not configured")
+            self._engine = create_async_engine(self._url)
+            self._session_maker = sessionmaker(bind=self._engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def warm_up(self):
+        self.init()
+        async with self._engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def close(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+        self._engine = None
+        self._session_maker = None
 
     @contextlib.asynccontextmanager
     async def session(self):
+        self.init()
         if self._session_maker is None:
             raise Exception("Session is not initialized")
         async with self._session_maker() as session:
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from FastAPI import models
+
+KEY_TTL = timedelta(hours=24)
+CLEANUP_INTERVAL_SECONDS = 3600
+
+
+@dataclass
+class IdempotencyRequest:
+    key: str | None
+    fingerprint: str
+
+
+async def get_idempotency(request: Request,
+                          idempotency_key: str | None = Header(None, max_length=64)) -> IdempotencyRequest:
+    """Dependency: the Idempotency-Key header plus a fingerprint of method, path and body."""
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(await request.body())
+    return IdempotencyRequest(key=idempotency_key, fingerprint=digest.hexdigest())
+
+
+async def get_response(db: AsyncSession, idem: IdempotencyRequest) -> JSONResponse | None:
+    """Return the stored response for a replayed Idempotency-Key, if any.
+
+    An expired key is deleted so the current request can reuse it.
+    """
+    if not idem.key:
+        return None
+    result = await db.execute(select(models.IdempotencyKeys).where(models.IdempotencyKeys.key == idem.key))
+    stored = result.scalar_one_or_none()
+    if stored is None:
+        return None
+    if stored.created_at <= datetime.utcnow() - KEY_TTL:
+        await db.delete(stored)
+        await db.flush()
+        return None
+    if stored.fingerprint != idem.fingerprint:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Idempotency-Key вже використано для іншого запиту")
+    return JSONResponse(status_code=stored.status_code, content=json.loads(stored.response))
+
+
+def remember(db: AsyncSession, idem: IdempotencyRequest, status_code: int, content) -> None:
+    """Stage the response under the key so it is committed together with the write."""
+    if not idem.key:
+        return
+    db.add(models.IdempotencyKeys(
+        key=idem.key,
+        fingerprint=idem.fingerprint,
+        status_code=status_code,
+        response=json.dumps(jsonable_encoder(content)),
+        created_at=datetime.utcnow()
+    ))
+
+
+async def commit(db: AsyncSession, idem: IdempotencyRequest) -> JSONResponse | None:
+    """Commit the write; if a concurrent request with the same key won, return its response."""
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        replay = await get_response(db, idem)
+        if replay is None:
+            raise
+        return replay
+    return None
+
+
+async def purge_expired(db: AsyncSession) -> int:
+    result = await db.execute(
+        delete(models.IdempotencyKeys).where(models.IdempotencyKeys.created_at <= datetime.utcnow() - KEY_TTL)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def cleanup_loop(sessionmanager) -> None:
+    while True:
+        try:
+            async with sessionmanager.session() as db:
+                await purge_expired(db)
+        except Exception as e:
+            print(f"Помилка очищення ключів ідемпотентності: {e}")
+        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
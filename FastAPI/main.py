@@ -1,31 +1,54 @@
+import asyncio
 import io
+import json
+from contextlib import asynccontextmanager, suppress
 
-import openpyxl
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 from fastapi.responses import StreamingResponse
 
 from starlette import status
 
-from FastAPI.db import get_db
-from FastAPI import models, schemas
-from FastAPI.currency_parser import get_usd_exchange_rate
-from reports.report_generator import generate_expense_report
+from FastAPI.db import get_db, sessionmanager
+from FastAPI import models, schemas, idempotency
+from FastAPI.currency_parser import get_usd_exchange_rate, convert_to_usd
+from FastAPI.repricing import reprice_expenses
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await sessionmanager.warm_up()
+    await run_in_threadpool(get_usd_exchange_rate)
+    cleanup = asyncio.create_task(idempotency.cleanup_loop(sessionmanager))
+    yield
+    cleanup.cancel()
+    with suppress(asyncio.CancelledError):
+        await cleanup
+    await sessionmanager.close()
+
 
 app = FastAPI(
-    title="Expenses Tracker API"
+    title="Expenses Tracker API",
+    lifespan=lifespan
 )
 
 
 @app.post("/expenses/", response_model=schemas.ExpenseResponse, status_code=status.HTTP_201_CREATED)
-async def add_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_db)):
+async def add_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_db),
+                      idem: idempotency.IdempotencyRequest = Depends(idempotency.get_idempotency)):
+    replay = await idempotency.get_response(db, idem)
+    if replay:
+        return replay
+
     usd_rate = get_usd_exchange_rate()
     if usd_rate == 0.0:
         raise HTTPException(status_code=500, detail="Не вдалося отримати курс USD")
 
-    amount_usd = round(expense.price_uah / usd_rate, 2)
+    amount_usd = convert_to_usd(expense.price_uah, usd_rate)
 
     new_expense = models.Expenses(
 
@@ -35,9 +58,41 @@ async def add_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends
         price_usd=amount_usd
     )
     db.add(new_expense)
-    await db.commit()
-    await db.refresh(new_expense)
-    return new_expense
+    await db.flush()
+    response = schemas.ExpenseResponse.model_validate(new_expense, from_attributes=True)
+    idempotency.remember(db, idem, status.HTTP_201_CREATED, response)
+    replay = await idempotency.commit(db, idem)
+    return replay or response
+
+
+@app.post("/expenses/bulk/", response_model=schemas.ExpenseBulkResponse, status_code=status.HTTP_201_CREATED)
+async def add_expenses_bulk(payload: schemas.ExpenseBulkCreate, db: AsyncSession = Depends(get_db),
+                            idem: idempotency.IdempotencyRequest = Depends(idempotency.get_idempotency)):
+    replay = await idempotency.get_response(db, idem)
+    if replay:
+        return replay
+
+    if not payload.expenses:
+        return {"created": 0}
+
+    usd_rate = get_usd_exchange_rate()
+    if usd_rate == 0.0:
+        raise HTTPException(status_code=500, detail="Не вдалося отримати курс USD")
+
+    rows = [
+        {
+            "description": expense.description,
+            "date": expense.date_created,
+            "price_uah": expense.price_uah,
+            "price_usd": convert_to_usd(expense.price_uah, usd_rate)
+        }
+        for expense in payload.expenses
+    ]
+    await db.execute(insert(models.Expenses), rows)
+    response = {"created": len(rows)}
+    idempotency.remember(db, idem, status.HTTP_201_CREATED, response)
+    replay = await idempotency.commit(db, idem)
+    return replay or response
 
 
 @app.get("/expenses/", response_model=list[schemas.ExpenseResponse])
@@ -54,7 +109,12 @@ async def get_expenses(start_date: str, end_date: str, db: AsyncSession = Depend
 
 
 @app.delete("/expenses/{expense_id}")
-async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db),
+                         idem: idempotency.IdempotencyRequest = Depends(idempotency.get_idempotency)):
+    replay = await idempotency.get_response(db, idem)
+    if replay:
+        return replay
+
     query = select(models.Expenses).where(models.Expenses.id == expense_id)
     result = await db.execute(query)
     expense = result.scalar_one_or_none()
@@ -63,8 +123,10 @@ async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Витрату не знайдено")
 
     await db.delete(expense)
-    await db.commit()
-    return {"message": "Витрату успішно видалено"}
+    response = {"message": "Витрату успішно видалено"}
+    idempotency.remember(db, idem, status.HTTP_200_OK, response)
+    replay = await idempotency.commit(db, idem)
+    return replay or response
 
 
 @app.get('/expenses/{expense_id}', response_model=schemas.ExpenseResponse)
@@ -74,7 +136,12 @@ async def get_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
     return result.scalar_one()
 
 @app.put("/expenses/{expense_id}", response_model=schemas.ExpenseResponse)
-async def update_expense(expense_id: int, updated: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_db)):
+async def update_expense(expense_id: int, updated: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_db),
+                         idem: idempotency.IdempotencyRequest = Depends(idempotency.get_idempotency)):
+    replay = await idempotency.get_response(db, idem)
+    if replay:
+        return replay
+
     query = select(models.Expenses).where(models.Expenses.id == expense_id)
     result = await db.execute(query)
     expense = result.scalar_one_or_none()
@@ -88,11 +155,12 @@ async def update_expense(expense_id: int, updated: schemas.ExpenseUpdate, db: As
 
     expense.description = updated.description
     expense.price_uah = updated.price_uah
-    expense.price_usd = round(updated.price_uah / usd_rate, 2)
+    expense.price_usd = convert_to_usd(updated.price_uah, usd_rate)
 
-    await db.commit()
-    await db.refresh(expense)
-    return expense
+    response = schemas.ExpenseResponse.model_validate(expense, from_attributes=True)
+    idempotency.remember(db, idem, status.HTTP_200_OK, response)
+    replay = await idempotency.commit(db, idem)
+    return replay or response
 
 
 @app.get("/expenses/report/")
@@ -110,6 +178,8 @@ async def get_expense_report(start_date: str, end_date: str, db: AsyncSession =
     if not expenses:
         raise HTTPException(status_code=404, detail="Витрат за вказаний період не знайдено")
 
+    from reports.report_generator import generate_expense_report
+
     report_bytes = generate_expense_report(expenses)
 
     return StreamingResponse(io.BytesIO(report_bytes),
@@ -122,6 +192,8 @@ async def get_all_expenses_xlsx(db: AsyncSession = Depends(get_db)):
     result = await db.execute(query)
     expenses = result.scalars().all()
 
+    import openpyxl
+
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "Всі витрати"
@@ -138,3 +210,32 @@ async def get_all_expenses_xlsx(db: AsyncSession = Depends(get_db)):
     return StreamingResponse(stream, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": "attachment; filename=all_expenses.xlsx"})
 
 
+@app.put("/rates/", response_model=schemas.RateUpdate)
+async def set_rate(rate: schemas.RateUpdate, db: AsyncSession = Depends(get_db)):
+    stmt = pg_insert(models.Rates).values(date=rate.date, usd_rate=rate.usd_rate)
+    stmt = stmt.on_conflict_do_update(index_elements=[models.Rates.date], set_={"usd_rate": stmt.excluded.usd_rate})
+    await db.execute(stmt)
+    await db.commit()
+    return rate
+
+
+@app.post("/expenses/reprice/")
+async def reprice(start_date: str, end_date: str):
+    try:
+        start = datetime.strptime(start_date, "%d.%m.%Y").date()
+        end = datetime.strptime(end_date, "%d.%m.%Y").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Невірний формат дати. Використовуйте dd.mm.YYYY")
+
+    # NDJSON stream: one progress line per chunk, then the RepriceResponse totals.
+    async def progress_lines():
+        # The request's get_db session is closed before a streamed body is sent, so use our own.
+        progress = {"updated": 0}
+        chunks = 0
+        async with sessionmanager.session() as db:
+            async for progress in reprice_expenses(db, start, end):
+                chunks += 1
+                yield json.dumps(progress) + "\n"
+        yield schemas.RepriceResponse(updated=progress["updated"], chunks=chunks).model_dump_json() + "\n"
+
+    return StreamingResponse(progress_lines(), media_type="application/x-ndjson")
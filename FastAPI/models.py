@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Date, Boolean, Text, ForeignKey, DateTime, func, Enum
+from sqlalchemy import Integer, String, Date, Boolean, Text, ForeignKey, DateTime, func, Enum, Numeric, SmallInteger
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -7,8 +7,22 @@ Base = declarative_base()
 class Expenses(Base):
     __tablename__ = 'expenses'
     id = mapped_column(Integer, primary_key=True, autoincrement=True)
-    price_uah = mapped_column(Integer, primary_key=True)
-    price_usd = mapped_column(Integer, primary_key=True)
+    price_uah = mapped_column(Numeric(12, 2), primary_key=True)
+    price_usd = mapped_column(Numeric(12, 2), primary_key=True)
     date = mapped_column(Date, primary_key=True)
     description = mapped_column(String(255))
 
+
+class Rates(Base):
+    __tablename__ = 'rates'
+    date = mapped_column(Date, primary_key=True)
+    usd_rate = mapped_column(Numeric(12, 4), nullable=False)
+
+
+class IdempotencyKeys(Base):
+    __tablename__ = 'idempotency_keys'
+    key = mapped_column(String(64), primary_key=True)
+    fingerprint = mapped_column(String(64), nullable=False)
+    status_code = mapped_column(SmallInteger, nullable=False)
+    response = mapped_column(Text, nullable=False)
+    created_at = mapped_column(DateTime, server_default=func.now(), nullable=False, index=True)
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from FastAPI import models
+
+CHUNK_SIZE = 5000
+
+
+async def reprice_expenses(db: AsyncSession, start: date, end: date,
+                           chunk_size: int = CHUNK_SIZE) -> AsyncIterator[dict]:
+    """Recompute price_usd from the rates table for expenses dated in [start, end].
+
+    Works in id windows of `chunk_size`, each one a single UPDATE ... FROM rates
+    committed on its own, and yields progress after every window.
+    """
+    bounds = await db.execute(
+        select(func.min(models.Expenses.id), func.max(models.Expenses.id))
+        .where(models.Expenses.date.between(start, end))
+    )
+    min_id, max_id = bounds.one()
+    if min_id is None:
+        return
+
+    updated = 0
+    for low in range(min_id, max_id + 1, chunk_size):
+        high = min(low + chunk_size - 1, max_id)
+        stmt = (
+            update(models.Expenses)
+            .where(models.Expenses.date == models.Rates.date,
+                   models.Expenses.date.between(start, end),
+                   models.Expenses.id.between(low, high))
+            .values(price_usd=func.round(models.Expenses.price_uah / models.Rates.usd_rate, 2))
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        updated += result.rowcount
+        yield {
+            "updated": updated,
+            "last_id": high,
+            "max_id": max_id,
+            "percent": round((high - min_id + 1) * 100 / (max_id - min_id + 1), 1)
+        }
+
+
+async def main(start_date: str, end_date: str) -> None:
+    from FastAPI.db import sessionmanager
+
+    start = datetime.strptime(start_date, "%d.%m.%Y").date()
+    end = datetime.strptime(end_date, "%d.%m.%Y").date()
+
+    progress = {"updated": 0}
+    async with sessionmanager.session() as db:
+        async for progress in reprice_expenses(db, start, end):
+            print(f"{progress['percent']:5.1f}%  id <= {progress['last_id']}  оновлено: {progress['updated']}")
+    await sessionmanager.close()
+    print(f"Готово. Оновлено витрат: {progress['updated']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Використання: python -m FastAPI.repricing dd.mm.YYYY dd.mm.YYYY")
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1], sys.argv[2]))
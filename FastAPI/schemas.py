@@ -1,15 +1,23 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, Field
 from datetime import date
+from decimal import Decimal
 
 
 class ExpenseCreate(BaseModel):
-    price_uah: int
+    price_uah: Decimal = Field(..., max_digits=12, decimal_places=2)
     date_created: date
     description: str
 
+class ExpenseBulkCreate(BaseModel):
+    expenses: list[ExpenseCreate] = Field(..., max_length=1000)
+
+
+class ExpenseBulkResponse(BaseModel):
+    created: int
+
 class ExpenseUpdate(BaseModel):
     description: str
-    price_uah: float
+    price_uah: Decimal = Field(..., max_digits=12, decimal_places=2)
 
 
 class ExpenseResponse(BaseModel):
@@ -20,4 +28,14 @@ class ExpenseResponse(BaseModel):
     price_usd: float
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class RateUpdate(BaseModel):
+    date: date
+    usd_rate: float = Field(..., gt=0)
+
+
+class RepriceResponse(BaseModel):
+    updated: int
+    chunks: int
@@ -0,0 +1,50 @@
+"""Numeric money columns and rates table
+
+Revision ID: 4c1e9a7d2f30
+Revises: bda13b5668da
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e9a7d2f30'
+down_revision: Union[str, None] = 'bda13b5668da'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('expenses', 'price_uah',
+                    existing_type=sa.Integer(),
+                    type_=sa.Numeric(precision=12, scale=2),
+                    existing_nullable=False)
+    op.alter_column('expenses', 'price_usd',
+                    existing_type=sa.Integer(),
+                    type_=sa.Numeric(precision=12, scale=2),
+                    existing_nullable=False)
+    op.create_table('rates',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('usd_rate', sa.Numeric(precision=12, scale=4), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rates')
+    op.alter_column('expenses', 'price_usd',
+                    existing_type=sa.Numeric(precision=12, scale=2),
+                    type_=sa.Integer(),
+                    existing_nullable=False,
+                    postgresql_using='round(price_usd)::integer')
+    op.alter_column('expenses', 'price_uah',
+                    existing_type=sa.Numeric(precision=12, scale=2),
+                    type_=sa.Integer(),
+                    existing_nullable=False,
+                    postgresql_using='round(price_uah)::integer')
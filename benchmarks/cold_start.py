@@ -0,0 +1,77 @@
+"""Cold-start benchmark for the API and the bot.
+
+Reports module import time for `FastAPI.main` and `telegram/bot.py`, and the
+time from launching uvicorn until the first successful API request.
+
+Usage (from the repository root, with .env configured):
+    python benchmarks/cold_start.py [--runs 5] [--port 8765]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "sys.path[:0] = {paths!r}\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def measure_import(module: str, paths: list[str]) -> float:
+    code = IMPORT_SNIPPET.format(module=module, paths=paths)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(port: int, timeout: float) -> float:
+    url = f"http://127.0.0.1:{port}/expenses/?start_date=01.01.2000&end_date=01.01.2000"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "FastAPI.main:app", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"API did not answer within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(name: str, samples: list[float]) -> None:
+    print(f"{name:<28} median {statistics.median(samples) * 1000:8.1f} ms   "
+          f"min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    report("import FastAPI.main", [measure_import("FastAPI.main", [ROOT]) for _ in range(args.runs)])
+    report("import bot", [measure_import("bot", [ROOT, os.path.join(ROOT, "telegram")]) for _ in range(args.runs)])
+    report("first successful request", [measure_first_request(args.port, args.timeout) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
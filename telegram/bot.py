@@ -1,47 +1,78 @@
 import asyncio
 import io
 import logging
-import os
 import re
 import sys
 from datetime import datetime
 import json
 
-from aiogram import Bot, Dispatcher, html, F, types
+from aiogram import Bot, Dispatcher, html, F
 from aiogram.client.default import DefaultBotProperties
 import aiohttp
 from aiogram.enums import ParseMode
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, ReplyKeyboardMarkup, InputFile, FSInputFile
+from aiogram.types import Message, ReplyKeyboardMarkup, BufferedInputFile
 
-from keyboards import (add_expense, remove_expense, get_review, patch_expense)
+from keyboards import (add_expense, remove_expense, get_review, patch_expense, import_expenses)
+from importer import iter_rows, iter_chunks, count_remaining, parse_amount
 from FastAPI.config import config
-from states import AddExpenseState, ReportState, DeleteExpenseState, UpdateExpenseState
-from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from states import AddExpenseState, ImportExpenseState, ReportState, DeleteExpenseState, UpdateExpenseState
 
 TOKEN = config.BOT_TOKEN
 API_URL = config.API_URL
 
+MENU_BUTTONS = (
+    "Додати статтю витрат",
+    "Видалити статтю витрат",
+    "Отримати звіт",
+    "Відредагувати статтю витрат",
+    "Імпортувати витрати",
+)
+
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
 dp = Dispatcher()
 bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
 
+def make_idempotency_key(message: Message, suffix: str = "") -> str:
+    return f"{message.chat.id}:{message.message_id}{suffix}"
+
+
+async def send_with_retries(session: aiohttp.ClientSession, method: str, url: str, key: str, **kwargs) -> tuple[int, str]:
+    """Send a write request with an Idempotency-Key, retrying connection errors and 5xx responses."""
+    headers = {"Idempotency-Key": key}
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+        try:
+            async with session.request(method, url, headers=headers, **kwargs) as resp:
+                if resp.status < 500 or last_attempt:
+                    return resp.status, await resp.text()
+        except aiohttp.ClientError:
+            if last_attempt:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
 async def get_combined_kb() -> ReplyKeyboardMarkup:
     add = await add_expense()
     delete = await remove_expense()
     review = await get_review()
     patch = await patch_expense()
+    bulk = await import_expenses()
 
     kb = ReplyKeyboardMarkup(
-        keyboard=[[add, delete, review, patch]],
+        keyboard=[[add, delete, review, patch], [bulk]],
         resize_keyboard=True
     )
     return kb
 
 
 @dp.message(CommandStart())
-async def command_start_handler(message: Message) -> None:
+async def command_start_handler(message: Message, state: FSMContext) -> None:
+    await state.clear()
     await message.answer(f"Hello, {html.bold(message.from_user.full_name)}!", reply_markup=await get_combined_kb())
 
 
@@ -71,12 +102,11 @@ async def process_date(message: Message, state: FSMContext):
 
 @dp.message(AddExpenseState.price)
 async def process_amount(message: Message, state: FSMContext):
-    try:
-        amount = int(float(message.text.replace(',', '.')))
-    except ValueError:
+    amount = parse_amount(message.text)
+    if amount is None:
         await message.answer("Невірний формат суми. Спробуйте ще раз:")
         return
-    await state.update_data(amount=amount)
+    await state.update_data(amount=str(amount))
     data = await state.get_data()
     try:
         date_object = datetime.strptime(data["date"], "%d.%m.%Y").date()
@@ -92,12 +122,13 @@ async def process_amount(message: Message, state: FSMContext):
 
     async with aiohttp.ClientSession() as session:
         try:
-            async with session.post(f"{API_URL}/expenses/", json=payload) as resp:
-                if resp.status == 201:
-                    await message.answer("Витрату успішно додано!", reply_markup=await get_combined_kb())
-                else:
-                    text = await resp.text()
-                    await message.answer(f"Помилка: {resp.status}\n{text}")
+            resp_status, text = await send_with_retries(
+                session, "POST", f"{API_URL}/expenses/", make_idempotency_key(message), json=payload
+            )
+            if resp_status == 201:
+                await message.answer("Витрату успішно додано!", reply_markup=await get_combined_kb())
+            else:
+                await message.answer(f"Помилка: {resp_status}\n{text}")
         except Exception as e:
             await message.answer(f"Помилка з’єднання з сервером: {e}")
 
@@ -106,6 +137,85 @@ async def process_amount(message: Message, state: FSMContext):
 # /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
 
+@dp.message(F.text == "Імпортувати витрати")
+async def start_import_expenses(message: Message, state: FSMContext):
+    await message.answer(
+        "Надішліть файл .csv або .xlsx з колонками: Опис, Дата (dd.mm.YYYY), Сума (UAH).\n"
+        "Перший рядок вважається заголовком і пропускається."
+    )
+    await state.set_state(ImportExpenseState.waiting_for_file)
+
+
+@dp.message(ImportExpenseState.waiting_for_file, F.document)
+async def process_import_file(message: Message, state: FSMContext):
+    document = message.document
+    file_name = document.file_name or ""
+    if not file_name.lower().endswith((".csv", ".xlsx")):
+        await message.answer("Підтримуються лише файли .csv та .xlsx. Спробуйте ще раз:")
+        return
+
+    stream = io.BytesIO()
+    await message.bot.download(document, destination=stream)
+    stream.seek(0)
+
+    accepted = 0
+    rejected = 0
+    error = None
+    unprocessed = "невідомо"
+    chunks = enumerate(iter_chunks(iter_rows(file_name, stream)))
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                index, (chunk, chunk_rejected) = next(chunks)
+            except StopIteration:
+                break
+            except Exception as e:
+                # The file can't be read further, so the number of remaining rows is unknown.
+                error = e
+                break
+            rejected += chunk_rejected
+            if not chunk:
+                continue
+            try:
+                resp_status, text = await send_with_retries(
+                    session, "POST", f"{API_URL}/expenses/bulk/", make_idempotency_key(message, f":{index}"),
+                    json={"expenses": chunk}
+                )
+                if resp_status == 201:
+                    accepted += json.loads(text)["created"]
+                else:
+                    rejected += len(chunk)
+            except Exception as e:
+                error = e
+                remaining = count_remaining(item for _, item in chunks)
+                if remaining is not None:
+                    unprocessed = len(chunk) + remaining
+                break
+
+    if error is not None:
+        await state.clear()
+        await message.answer(
+            f"Помилка при імпорті файлу: {error}\n"
+            f"Імпорт виконано частково.\nДодано: {accepted}\nВідхилено: {rejected}\n"
+            f"Не оброблено: {unprocessed}",
+            reply_markup=await get_combined_kb()
+        )
+        return
+
+    await state.clear()
+    await message.answer(
+        f"Імпорт завершено.\nДодано: {accepted}\nВідхилено: {rejected}",
+        reply_markup=await get_combined_kb()
+    )
+
+
+@dp.message(ImportExpenseState.waiting_for_file, ~F.text.in_(MENU_BUTTONS))
+async def process_import_not_file(message: Message, state: FSMContext):
+    await message.answer("Надішліть файл .csv або .xlsx або оберіть інший пункт меню:")
+
+# /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+
 @dp.message(F.text == "Отримати звіт")
 async def get_report_start(message: Message, state: FSMContext):
     await message.answer("Введіть дату початку періоду (dd.mm.YYYY):")
@@ -143,11 +253,7 @@ async def process_end_date(message: Message, state: FSMContext):
                 if response.status == 200:
                     content = await response.read()
 
-                    file_path = "report.xlsx"
-                    with open(file_path, "wb") as f:
-                        f.write(content)
-
-                    file = FSInputFile(file_path)
+                    file = BufferedInputFile(content, filename="report.xlsx")
 
                     await message.answer_document(
                         document=file,
@@ -157,8 +263,6 @@ async def process_end_date(message: Message, state: FSMContext):
                     total_uah = response.headers.get("X-Total-UAH")
                     if total_uah:
                         await message.answer(f"Загальна сума витрат: {total_uah} грн")
-
-                    os.remove(file_path)
                 else:
                     await message.answer(f"Помилка при отриманні звіту: {response.status}")
         except Exception as e:
@@ -177,11 +281,7 @@ async def start_delete_expense(message: Message, state: FSMContext):
                 if response.status == 200:
                     content = await response.read()
 
-                    file_path = "report.xlsx"
-                    with open(file_path, "wb") as f:
-                        f.write(content)
-
-                    file = FSInputFile(file_path)
+                    file = BufferedInputFile(content, filename="report.xlsx")
 
                     await message.answer_document(
                         document=file,
@@ -203,13 +303,15 @@ async def process_delete_id(message: Message, state: FSMContext):
 
     async with aiohttp.ClientSession() as session:
         try:
-            async with session.delete(f"{API_URL}/expenses/{expense_id}") as resp:
-                if resp.status == 200:
-                    await message.answer("Витрату успішно видалено!")
-                elif resp.status == 404:
-                    await message.answer("Витрату з таким ID не знайдено.")
-                else:
-                    await message.answer(f"Помилка при видаленні: {resp.status}")
+            resp_status, _ = await send_with_retries(
+                session, "DELETE", f"{API_URL}/expenses/{expense_id}", make_idempotency_key(message)
+            )
+            if resp_status == 200:
+                await message.answer("Витрату успішно видалено!")
+            elif resp_status == 404:
+                await message.answer("Витрату з таким ID не знайдено.")
+            else:
+                await message.answer(f"Помилка при видаленні: {resp_status}")
         except Exception as e:
             await message.answer(f"Помилка з’єднання з сервером: {e}")
 
@@ -225,11 +327,7 @@ async def start_patch_expense(message: Message, state: FSMContext):
                 if response.status == 200:
                     content = await response.read()
 
-                    file_path = "report.xlsx"
-                    with open(file_path, "wb") as f:
-                        f.write(content)
-
-                    file = FSInputFile(file_path)
+                    file = BufferedInputFile(content, filename="report.xlsx")
 
                     await message.answer_document(
                         document=file,
@@ -285,14 +383,13 @@ async def process_description(message: Message, state: FSMContext):
 
 @dp.message(UpdateExpenseState.waiting_for_price)
 async def process_price(message: Message, state: FSMContext):
-    try:
-        new_price_uah = float(message.text.strip())
-        if new_price_uah <= 0:
-            await message.answer("Сума повинна бути більше нуля. Введіть коректну суму витрати:")
-            return
-    except ValueError:
+    new_price_uah = parse_amount(message.text)
+    if new_price_uah is None:
         await message.answer("Сума повинна бути числом. Введіть коректну суму витрати:")
         return
+    if new_price_uah <= 0:
+        await message.answer("Сума повинна бути більше нуля. Введіть коректну суму витрати:")
+        return
 
     data = await state.get_data()
     expense_id = data.get("expense_id")
@@ -302,13 +399,16 @@ async def process_price(message: Message, state: FSMContext):
         try:
             updated_expense = {
                 "description": new_description,
-                "price_uah": new_price_uah
+                "price_uah": str(new_price_uah)
             }
-            async with session.put(f"{API_URL}/expenses/{expense_id}", json=updated_expense) as response:
-                if response.status == 200:
-                    await message.answer("Статтю витрат успішно оновлено.")
-                else:
-                    await message.answer(f"Не вдалося оновити витрату: {response.status}")
+            resp_status, _ = await send_with_retries(
+                session, "PUT", f"{API_URL}/expenses/{expense_id}", make_idempotency_key(message),
+                json=updated_expense
+            )
+            if resp_status == 200:
+                await message.answer("Статтю витрат успішно оновлено.")
+            else:
+                await message.answer(f"Не вдалося оновити витрату: {resp_status}")
         except Exception as e:
             await message.answer(f"Помилка з’єднання з сервером: {e}")
 
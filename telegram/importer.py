@@ -0,0 +1,126 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Iterator
+
+CHUNK_SIZE = 200
+CSV_SAMPLE_SIZE = 4096
+# Rows at or above this are rejected individually instead of failing a whole chunk:
+# the API accepts at most 12 digits with 2 decimals (ExpenseCreate.price_uah).
+MAX_AMOUNT = 10 ** 10
+
+
+def parse_amount(raw) -> Decimal | None:
+    """Parse a UAH amount to kopecks precision; None if it is not a number that fits the money columns."""
+    try:
+        amount = Decimal(str(raw).strip().replace(',', '.'))
+        if not amount.is_finite():
+            return None
+        # Round before the range check so values that round up to the bound are rejected too.
+        amount = amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return None
+    if abs(amount) >= MAX_AMOUNT:
+        return None
+    return amount
+
+
+def parse_row(row) -> dict | None:
+    """Validate one (description, date, amount) row and build an API payload.
+
+    Returns None when the row is not a valid expense.
+    """
+    if row is None or len(row) < 3:
+        return None
+    description, raw_date, raw_amount = row[0], row[1], row[2]
+
+    if description is None or not str(description).strip():
+        return None
+    description = str(description).strip()[:255]
+
+    if isinstance(raw_date, datetime):
+        date_object = raw_date.date()
+    elif isinstance(raw_date, date):
+        date_object = raw_date
+    else:
+        try:
+            date_object = datetime.strptime(str(raw_date).strip(), "%d.%m.%Y").date()
+        except ValueError:
+            return None
+
+    amount = parse_amount(raw_amount)
+    if amount is None or amount <= 0:
+        return None
+
+    return {
+        "description": description,
+        "date_created": date_object.isoformat(),
+        "price_uah": str(amount)
+    }
+
+
+def _iter_csv(stream: io.BufferedIOBase) -> Iterator[list]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(CSV_SAMPLE_SIZE)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _iter_xlsx(stream: io.BufferedIOBase) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(file_name: str, stream: io.BufferedIOBase) -> Iterator[dict | None]:
+    """Stream parsed rows of an uploaded CSV/XLSX file, skipping the header row.
+
+    Yields a payload dict for every valid row and None for every rejected one.
+    """
+    name = (file_name or "").lower()
+    if name.endswith(".csv"):
+        rows = _iter_csv(stream)
+    elif name.endswith(".xlsx"):
+        rows = _iter_xlsx(stream)
+    else:
+        raise ValueError("Підтримуються лише файли .csv та .xlsx")
+
+    next(rows, None)
+    for row in rows:
+        if not row or all(cell is None or str(cell).strip() == "" for cell in row):
+            continue
+        yield parse_row(row)
+
+
+def iter_chunks(rows: Iterator[dict | None], size: int = CHUNK_SIZE) -> Iterator[tuple[list[dict], int]]:
+    """Group valid rows into chunks of `size`, yielding (chunk, rejected_in_chunk)."""
+    chunk = []
+    rejected = 0
+    for row in rows:
+        if row is None:
+            rejected += 1
+            continue
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk, rejected
+            chunk = []
+            rejected = 0
+    if chunk or rejected:
+        yield chunk, rejected
+
+
+def count_remaining(chunks: Iterator[tuple[list[dict], int]]) -> int | None:
+    """Count rows left in a partially consumed chunk iterator; None if reading the rest of the file fails."""
+    try:
+        return sum(len(chunk) + rejected for chunk, rejected in chunks)
+    except Exception:
+        return None
@@ -13,3 +13,6 @@ async def remove_expense() -> KeyboardButton:
 async def patch_expense() -> KeyboardButton:
     return KeyboardButton(text="Відредагувати статтю витрат")
 
+async def import_expenses() -> KeyboardButton:
+    return KeyboardButton(text="Імпортувати витрати")
+
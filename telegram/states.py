@@ -6,6 +6,9 @@ class AddExpenseState(StatesGroup):
     date = State()
     price = State()
 
+class ImportExpenseState(StatesGroup):
+    waiting_for_file = State()
+
 class ReportState(StatesGroup):
     start = State()
     end = State()